@@ -1,25 +1,138 @@
 #!/usr/bin/env python3
 import sys
+import io
+import os
+import json
+import logging
+import argparse
+import atexit
+import contextlib
+import sqlite3
 import requests
 import unicodedata
 import re
-from rdflib import Graph, URIRef, RDFS, Namespace
-from rdflib.exceptions import ParserError
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from xml.sax.saxutils import escape
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from lxml import etree
 
+log = logging.getLogger("persNamer")
+
+class VIAFError(Exception):
+    """
+    A VIAF record could not be fetched or parsed. Raised per record, so
+    that a batch can skip it and carry on with the others.
+    """
+
+# A single pooled session, so that repeated fetches reuse the same
+# TCP/TLS connection to viaf.org instead of re-handshaking every time.
+_SESSION = requests.Session()
+_SESSION.headers.update({
+    "Accept": "application/ld+json",
+    "User-Agent": "persNamer/1.0"
+})
+# Transient failures (rate limiting, gateway errors, dropped connections)
+# are retried with exponential backoff instead of aborting the whole run.
+_RETRY = Retry(total=5, backoff_factor=0.3, status_forcelist=(429, 502, 503, 504),
+               allowed_methods=("GET",))
+_SESSION.mount("https://", HTTPAdapter(max_retries=_RETRY, pool_connections=4, pool_maxsize=20))
+atexit.register(_SESSION.close)
+
+_SPACE_RE = re.compile(r'(?<=[a-z])(?=[A-Z])')
+_NONALNUM_RE = re.compile(r'[^a-zA-Z0-9]')
+_DATE_RE = re.compile(r'^(\d{4})-(\d{2})-00$')
+
+# TEI attribute names and values, built once rather than per entry.
+_XML_ID = "{http://www.w3.org/XML/1998/namespace}id"
+_IDNO_ATTR = {"type": "VIAF"}
+_WARN_ATTR = {"type": "warning"}
+
+# Fixed-shape TEI output, laid out exactly as lxml's pretty_print would.
+_PERSON_TMPL = (
+    '<person xml:id="{xid}">\n'
+    '  <persName>{name}</persName>\n'
+    '{birth}{death}'
+    '  <idno type="VIAF">{viaf}</idno>\n'
+    '{warn}'
+    '</person>\n'
+)
+_BIRTH_TMPL = '  <birth>{}</birth>\n'
+_DEATH_TMPL = '  <death>{}</death>\n'
+_WARN_TMPL = '  <note type="warning">{}</note>\n'
+_ANNOTATION_TMPL = '<persName ref="#{xid}">{name}</persName>\n'
+_TEXT_ENTITIES = {"\r": "&#13;"}
+_ATTR_ENTITIES = {'"': "&quot;", "\n": "&#10;", "\r": "&#13;", "\t": "&#9;"}
+# Characters lxml refuses to serialize (not allowed in XML 1.0).
+_XML_ILLEGAL_RE = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ud800-\udfff\ufffe\uffff]')
+
+CACHE_PATH = os.path.expanduser("~/.cache/persNamer.db")
+# The cache stores parsed tuples, not raw records: bump this whenever the
+# extraction logic changes, so that stale rows are dropped.
+_CACHE_VERSION = 2
+
+NSMAP = {
+    "rdf": "http://www.w3.org/1999/02/22-rdf-syntax-ns#",
+    "rdfs": "http://www.w3.org/2000/01/rdf-schema#",
+    "viaf": "http://viaf.org/ontology/1.1#",
+    "schema": "http://schema.org/",
+    "mads": "http://www.loc.gov/mads/rdf/v1#",
+    "skos": "http://www.w3.org/2004/02/skos/core#",
+}
+
+def _tags(*names):
+    """
+    Expands prefixed names ("schema:name") to lxml's {namespace}local form.
+    """
+    return frozenset("{%s}%s" % (NSMAP[prefix], local)
+                     for prefix, local in (n.split(":") for n in names))
+
+_RDF_ABOUT = "{%s}about" % NSMAP["rdf"]
+# The cluster URI may appear with either scheme, with or without a trailing slash.
+_SUBJECT_SCHEMES = ("http", "https")
+_SUBJECT_SUFFIXES = ("/", "")
+_NAME_TAGS = _tags("rdfs:label", "schema:name", "viaf:mainHead",
+                   "mads:authoritativeLabel", "skos:prefLabel")
+_BIRTH_TAGS = _tags("viaf:birthDate", "schema:birthDate")
+_DEATH_TAGS = _tags("viaf:deathDate", "schema:deathDate")
+_PROPERTY_TAGS = tuple(_NAME_TAGS | _BIRTH_TAGS | _DEATH_TAGS)
+
+def _iris(tags):
+    """
+    Turns {namespace}local tags back into plain IRIs, as used by JSON-LD.
+    """
+    return frozenset(tag[1:].replace("}", "", 1) for tag in tags)
+
+_NAME_IRIS = _iris(_NAME_TAGS)
+_BIRTH_IRIS = _iris(_BIRTH_TAGS)
+_DEATH_IRIS = _iris(_DEATH_TAGS)
+
 def fix_name_spacing(name):
     """
     Inserts a space between a lowercase letter and an uppercase letter
     if not already present.
     Example: "Gian GaleazzoSanseverino" -> "Gian Galeazzo Sanseverino"
     """
-    return re.sub(r'(?<=[a-z])(?=[A-Z])', ' ', name)
+    return _SPACE_RE.sub(' ', name)
+
+def fix_date(date_str):
+    """
+    Fixes a VIAF date: if the day is "00", returns only the year.
+    Example: "1572-08-00" -> "1572"
+    """
+    m = _DATE_RE.match(date_str)
+    if m:
+        return m.group(1)
+    return date_str
 
+@functools.lru_cache(maxsize=4096)
 def generate_xml_id(full_name, viaf):
     """
     Given a full name (e.g., "Gian Galeazzo Sanseverino"), returns an XML id in the format:
       pers-[familyname]-[givenname initial]
     If full_name is empty, falls back to using the VIAF number.
+    Results are memoized, since the function is pure and names recur in batches.
     """
     if not full_name or full_name.strip() == "":
         return f"pers-viaf-{viaf}"
@@ -33,39 +146,203 @@ def generate_xml_id(full_name, viaf):
         family = fixed_name
         given = fixed_name[0]
     # Normalize: remove diacritics and non-alphanumerics.
-    family_ascii = unicodedata.normalize('NFKD', family)
-    family_ascii = ''.join(c for c in family_ascii if not unicodedata.combining(c))
-    family_ascii = re.sub(r'[^a-zA-Z0-9]', '', family_ascii).lower()
+    # ASCII-only names have nothing to decompose, so skip NFKD for them.
+    if family.isascii():
+        family_ascii = family
+    else:
+        # Dropping everything non-ASCII after NFKD removes the combining
+        # marks; any other non-ASCII character is stripped below anyway.
+        family_ascii = unicodedata.normalize('NFKD', family)
+        family_ascii = family_ascii.encode('ascii', 'ignore').decode('ascii')
+    family_ascii = _NONALNUM_RE.sub('', family_ascii).lower()
     given_initial = given[0].lower() if given else ''
     return f"pers-{family_ascii}-{given_initial}"
 
-def fetch_viaf_rdf(viaf):
+def _request_viaf(viaf, headers=None):
     """
-    Fetches the RDF representation of a VIAF record using HTTP content negotiation,
-    requesting RDF/XML.
+    Issues the GET for a VIAF record over the shared pooled session and
+    returns the response. Extra headers (e.g. conditional ones) are merged
+    with the session defaults. Raises VIAFError on HTTP/network failures
+    and if the response is neither XML nor JSON.
     """
-    print("Starting to fetch VIAF record (RDF)...")
     url = f"https://viaf.org/viaf/{viaf}"
-    print(f"Fetching data from URL: {url}")
-    headers = {
-        "Accept": "application/rdf+xml",
-        "User-Agent": "persNamer/1.0 (verbose mode)"
-    }
+    log.debug("Fetching data from URL: %s", url)
     try:
-        response = requests.get(url, headers=headers, allow_redirects=True)
+        response = _SESSION.get(url, headers=headers, timeout=10)
+        if response.status_code == 406:
+            log.debug("JSON-LD not acceptable; falling back to RDF/XML.")
+            headers = {**(headers or {}), "Accept": "application/rdf+xml"}
+            response = _SESSION.get(url, headers=headers, timeout=10)
         response.raise_for_status()
-        print("Successfully fetched VIAF RDF data.")
-        return response.content
     except requests.exceptions.HTTPError as e:
-        print(f"HTTP error while fetching VIAF record: {e}")
-        sys.exit(1)
+        raise VIAFError(f"HTTP error while fetching VIAF record: {e}") from e
     except requests.exceptions.RequestException as e:
-        print(f"Network error while fetching VIAF record: {e}")
-        sys.exit(1)
+        raise VIAFError(f"Network error while fetching VIAF record: {e}") from e
+
+    # An HTML page (rate limiting, redirect chains) would only fail later in
+    # the parser, after paying for a full parse attempt; reject it here.
+    ctype = response.headers.get("Content-Type", "")
+    if response.status_code != 304 and "xml" not in ctype and "json" not in ctype:
+        raise VIAFError(f"Unexpected content type for VIAF record: {ctype or '(none)'}")
+    return response
+
+def fetch_viaf_rdf(viaf):
+    """
+    Fetches the RDF representation of a VIAF record using HTTP content negotiation,
+    requesting JSON-LD (RDF/XML if the server refuses). Uses the shared
+    pooled session.
+    """
+    log.debug("Starting to fetch VIAF record (RDF)...")
+    response = _request_viaf(viaf)
+    log.debug("Successfully fetched VIAF RDF data.")
+    return response.content
+
+def _map_concurrently(func, viafs, workers=16):
+    """
+    Applies func to each VIAF number on a thread pool of at most `workers`
+    threads. Yields (viaf, result, error) tuples in the same order as the
+    input. Any exception raised for one record is returned as its `error`
+    (with result None) instead of aborting the others; anything that is
+    not already a VIAFError is wrapped in one.
+    """
+    def call(viaf):
+        try:
+            return func(viaf), None
+        except VIAFError as e:
+            return None, e
+        except Exception as e:
+            log.debug("Unexpected error for VIAF %s", viaf, exc_info=True)
+            error = VIAFError(f"Unexpected error ({type(e).__name__}): {e}")
+            error.__cause__ = e
+            return None, error
+
+    viafs = list(viafs)
+    if not viafs:
+        return
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(viafs)))) as ex:
+        for viaf, (result, error) in zip(viafs, ex.map(call, viafs)):
+            yield viaf, result, error
+
+def fetch_viaf_rdf_many(viafs, workers=16):
+    """
+    Fetches several VIAF records concurrently over the pooled session.
+    Yields (viaf, rdf_bytes, error) tuples in the same order as the input,
+    error being the VIAFError of a failed record (rdf_bytes is then None).
+    """
+    return _map_concurrently(fetch_viaf_rdf, viafs, workers)
+
+def _collect_rdfxml(rdf_bytes, found):
+    """
+    Stream-parses RDF/XML with lxml, adding the name and dates of each
+    subject present in `found` to its [name, birth dates, death dates] record.
+    """
+    log.debug("Parsing RDF/XML data with lxml (streaming)...")
+    context = etree.iterparse(io.BytesIO(rdf_bytes), events=("end",), tag=_PROPERTY_TAGS)
+    try:
+        for _, elem in context:
+            parent = elem.getparent()
+            if parent is None:
+                # A bare property element as the document root: no subject.
+                continue
+            record = found.get(parent.get(_RDF_ABOUT))
+            val = (elem.text or "").strip()
+            if record is not None and val:
+                if elem.tag in _NAME_TAGS:
+                    record[0] = val
+                elif elem.tag in _BIRTH_TAGS:
+                    record[1].add(val)
+                else:
+                    record[2].add(val)
+            # Free everything parsed so far that is no longer needed.
+            elem.clear()
+            node = elem
+            while node.getparent() is not None:
+                while node.getprevious() is not None:
+                    del node.getparent()[0]
+                node = node.getparent()
+    except etree.XMLSyntaxError as e:
+        log.debug("Raw response (truncated): %r", rdf_bytes[:2000])
+        raise VIAFError(f"RDF/XML parser error, the data might be malformed RDF or HTML: {e}") from e
+
+def _jsonld_context(doc):
+    """
+    Merges the inline @context definitions of a JSON-LD document.
+    Remote contexts are not fetched.
+    """
+    ctx = doc.get("@context") if isinstance(doc, dict) else None
+    merged = {}
+    for c in (ctx if isinstance(ctx, list) else [ctx]):
+        if isinstance(c, dict):
+            merged.update(c)
+    return merged
+
+def _expand_jsonld_iri(key, context):
+    """
+    Expands a JSON-LD term or compact IRI ("schema:name") to a full IRI,
+    using the document context and falling back on NSMAP prefixes.
+    """
+    term = context.get(key, key)
+    if isinstance(term, dict):
+        term = term.get("@id", key)
+    if not isinstance(term, str):
+        return key
+    prefix, sep, local = term.partition(":")
+    if sep and not local.startswith("//"):
+        ns = context.get(prefix, NSMAP.get(prefix))
+        if isinstance(ns, dict):
+            ns = ns.get("@id")
+        if isinstance(ns, str):
+            return ns + local
+    elif not sep and not term.startswith("@") and isinstance(context.get("@vocab"), str):
+        return context["@vocab"] + term
+    return term
+
+def _jsonld_values(value):
+    """
+    Yields the stripped literal values of a JSON-LD property.
+    """
+    for v in (value if isinstance(value, list) else [value]):
+        if isinstance(v, dict):
+            v = v.get("@value")
+        if isinstance(v, (str, int)):
+            v = str(v).strip()
+            if v:
+                yield v
+
+def _collect_jsonld(rdf_bytes, found):
+    """
+    Walks a JSON-LD document, adding the name and dates of each node whose
+    @id is in `found` to its [name, birth dates, death dates] record.
+    """
+    log.debug("Parsing JSON-LD data...")
+    try:
+        doc = json.loads(rdf_bytes)
+    except ValueError as e:
+        log.debug("Raw response (truncated): %r", rdf_bytes[:2000])
+        raise VIAFError(f"JSON-LD parser error, the data might be malformed JSON or HTML: {e}") from e
+
+    context = _jsonld_context(doc)
+    nodes = doc.get("@graph", [doc]) if isinstance(doc, dict) else doc
+    for node in nodes:
+        if not isinstance(node, dict):
+            continue
+        record = found.get(_expand_jsonld_iri(node.get("@id", ""), context))
+        if record is None:
+            continue
+        for key, value in node.items():
+            prop = _expand_jsonld_iri(key, context)
+            if prop in _NAME_IRIS:
+                for val in _jsonld_values(value):
+                    record[0] = val
+            elif prop in _BIRTH_IRIS:
+                record[1].update(_jsonld_values(value))
+            elif prop in _DEATH_IRIS:
+                record[2].update(_jsonld_values(value))
 
 def parse_viaf_rdf(rdf_bytes, viaf):
     """
-    Parses the RDF (forcing format='xml') to extract:
+    Parses a VIAF record (JSON-LD or RDF/XML, detected from the payload),
+    reading only the properties of the VIAF cluster itself, to extract:
       - a preferred name,
       - birth date,
       - death date,
@@ -73,62 +350,22 @@ def parse_viaf_rdf(rdf_bytes, viaf):
     
     Returns a tuple: (name, birth, death, warning)
     where warning is a string describing multiple date values if found.
+    All four are None if no node for the cluster was found.
     """
-    print("Parsing RDF data with rdflib, forcing format='xml'...")
-    g = Graph()
-    try:
-        g.parse(data=rdf_bytes, format="xml")
-    except ParserError as e:
-        print("RDF/XML parser error. The data might be malformed RDF or HTML.")
-        print("Raw response (truncated):")
-        print(rdf_bytes[:2000])
-        sys.exit(f"Exiting due to parser error: {e}")
-
-    VIAF = Namespace("http://viaf.org/ontology/1.1#")
-    SCHEMA = Namespace("http://schema.org/")
-    MADS = Namespace("http://www.loc.gov/mads/rdf/v1#")
-    SKOS = Namespace("http://www.w3.org/2004/02/skos/core#")
-
-    name = None
-    birth_set = set()
-    death_set = set()
-
-    subjects = [
-        URIRef(f"http://viaf.org/viaf/{viaf}/"),
-        URIRef(f"http://viaf.org/viaf/{viaf}"),
-        URIRef(f"https://viaf.org/viaf/{viaf}/"),
-        URIRef(f"https://viaf.org/viaf/{viaf}")
-    ]
-
-    def extract_from_subject(subj):
-        nonlocal name
-        for p, o in g.predicate_objects(subj):
-            if p in (RDFS.label, SCHEMA.name, VIAF.mainHead, MADS.authoritativeLabel, SKOS.prefLabel):
-                if o and str(o).strip():
-                    name = str(o).strip()
-            elif p in (VIAF.birthDate, SCHEMA.birthDate):
-                val = str(o).strip()
-                if val:
-                    birth_set.add(val)
-            elif p in (VIAF.deathDate, SCHEMA.deathDate):
-                val = str(o).strip()
-                if val:
-                    death_set.add(val)
-
-    for subj in subjects:
-        extract_from_subject(subj)
+    # subject URI -> [name, birth dates, death dates], in lookup priority order.
+    found = {f"{scheme}://viaf.org/viaf/{viaf}{suffix}": [None, set(), set()]
+             for scheme in _SUBJECT_SCHEMES for suffix in _SUBJECT_SUFFIXES}
+    if rdf_bytes.lstrip()[:1] in (b"{", b"["):
+        _collect_jsonld(rdf_bytes, found)
+    else:
+        _collect_rdfxml(rdf_bytes, found)
+
+    for name, birth_set, death_set in found.values():
         if name or birth_set or death_set:
             break
 
-    birth = sorted(birth_set)[0] if birth_set else None
-    death = sorted(death_set)[0] if death_set else None
-    # Fix dates (if death date has a day of "00", return only the year).
-    def fix_date(date_str):
-        m = re.match(r'^(\d{4})-(\d{2})-00$', date_str)
-        if m:
-            return m.group(1)
-        return date_str
-
+    birth = min(birth_set) if birth_set else None
+    death = min(death_set) if death_set else None
     if birth:
         birth = fix_date(birth)
     if death:
@@ -147,7 +384,143 @@ def parse_viaf_rdf(rdf_bytes, viaf):
 
     return name, birth, death, warning
 
-def create_person_entry(viaf, name, birth, death, warning_note=None):
+def _parse_response(viaf, response):
+    """
+    Parses a fetched VIAF record. If a JSON-LD response yields nothing
+    (e.g. it relies on a remote @context), the record is requested again
+    as RDF/XML, as for a 406.
+    Returns the parse_viaf_rdf tuple and the response it was parsed from.
+    """
+    person = parse_viaf_rdf(response.content, viaf)
+    if not any(person[:3]) and response.content.lstrip()[:1] in (b"{", b"["):
+        log.info("Nothing found in the JSON-LD for VIAF %s; retrying as RDF/XML.", viaf)
+        response = _request_viaf(viaf, {"Accept": "application/rdf+xml"})
+        person = parse_viaf_rdf(response.content, viaf)
+    if not any(person[:3]):
+        log.warning("No name or dates found for VIAF cluster %s; the response format "
+                    "may not be supported.", viaf)
+    return person, response
+
+def _fetch_person(viaf):
+    """
+    Fetches and parses a VIAF record without the cache.
+    """
+    log.debug("Starting to fetch VIAF record (RDF)...")
+    response = _request_viaf(viaf)
+    log.debug("Successfully fetched VIAF RDF data.")
+    return _parse_response(viaf, response)[0]
+
+@functools.lru_cache(maxsize=None)
+def _prepare_cache(path):
+    """
+    Creates the SQLite cache of parsed VIAF records at path if needed and
+    checks its schema version, once per path for the whole run. Rows
+    written under another _CACHE_VERSION are discarded, so that a 304
+    never hands back a tuple produced by an older parser.
+    Returns path, or None if the cache is unusable (the run then goes on
+    without it).
+    """
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with contextlib.closing(sqlite3.connect(path, timeout=30)) as conn, conn:
+            # Lock before checking, so concurrent runs don't both reset the table.
+            conn.execute("BEGIN IMMEDIATE")
+            if conn.execute("PRAGMA user_version").fetchone()[0] != _CACHE_VERSION:
+                conn.execute("DROP TABLE IF EXISTS cache")
+                conn.execute(f"PRAGMA user_version = {_CACHE_VERSION}")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "viaf TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, "
+                "name TEXT, birth TEXT, death TEXT, warning TEXT)"
+            )
+    except (sqlite3.Error, OSError) as e:
+        log.warning("Record cache %s is unusable (%s); continuing without it.", path, e)
+        return None
+    return path
+
+def _cache_lookup(path, viaf):
+    """
+    Returns the cached (etag, last_modified, name, birth, death, warning)
+    row for viaf, or None.
+    """
+    with contextlib.closing(sqlite3.connect(path, timeout=30)) as conn:
+        return conn.execute(
+            "SELECT etag, last_modified, name, birth, death, warning FROM cache WHERE viaf = ?",
+            (viaf,)
+        ).fetchone()
+
+def _cache_store(path, viaf, response, person):
+    """
+    Stores a parsed record with the validators of the response it came from.
+    """
+    with contextlib.closing(sqlite3.connect(path, timeout=30)) as conn, conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (viaf, response.headers.get("ETag"), response.headers.get("Last-Modified"), *person)
+        )
+
+def get_person(viaf, cache_path=CACHE_PATH):
+    """
+    Fetches and parses a VIAF record, going through the on-disk cache.
+    A cached record is revalidated with a conditional GET (If-None-Match /
+    If-Modified-Since) and only re-parsed when VIAF reports a change.
+    Pass cache_path=None to bypass the cache; cache errors are logged and
+    the record is fetched without it. Records from which nothing could be
+    extracted are never cached.
+
+    Returns the same tuple as parse_viaf_rdf: (name, birth, death, warning)
+    """
+    if cache_path is not None:
+        cache_path = _prepare_cache(cache_path)
+    if cache_path is None:
+        return _fetch_person(viaf)
+
+    try:
+        row = _cache_lookup(cache_path, viaf)
+    except (sqlite3.Error, OSError) as e:
+        log.warning("Could not read the record cache for VIAF %s (%s); fetching without it.",
+                    viaf, e)
+        return _fetch_person(viaf)
+
+    headers = {}
+    if row:
+        etag, last_modified = row[0], row[1]
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+    log.debug("Starting to fetch VIAF record (RDF)...")
+    response = _request_viaf(viaf, headers)
+    if row and response.status_code == 304:
+        log.debug("VIAF record unchanged; using cached entry.")
+        return tuple(row[2:])
+    log.debug("Successfully fetched VIAF RDF data.")
+
+    person, response = _parse_response(viaf, response)
+    if not any(person[:3]):
+        # Don't let a 304 keep serving an empty record.
+        log.debug("Nothing extracted for VIAF %s; not caching it.", viaf)
+        return person
+    try:
+        _cache_store(cache_path, viaf, response, person)
+    except (sqlite3.Error, OSError) as e:
+        log.warning("Could not update the record cache for VIAF %s (%s).", viaf, e)
+    return person
+
+def get_people(viafs, workers=16, cache_path=CACHE_PATH):
+    """
+    Runs get_person concurrently over several VIAF numbers.
+    Yields (viaf, (name, birth, death, warning), error) tuples in input
+    order, error being the VIAFError of a failed record (the person tuple
+    is then None).
+    """
+    if cache_path is not None:
+        # Set the cache up once, before the workers start using it.
+        cache_path = _prepare_cache(cache_path)
+    return _map_concurrently(functools.partial(get_person, cache_path=cache_path), viafs, workers)
+
+def create_person_entry(viaf, name, birth, death, warning_note=None, xml_id=None):
     """
     Builds a TEI <person> element:
       <person xml:id="...">
@@ -157,11 +530,12 @@ def create_person_entry(viaf, name, birth, death, warning_note=None):
         <idno type="VIAF">viaf</idno>
         <note type="warning">warning_note</note>  (if provided)
       </person>
+    xml_id defaults to generate_xml_id(name, viaf).
     """
-    print("Creating TEI XML entry for the authority file...")
-    NS_XML = "http://www.w3.org/XML/1998/namespace"
-    xml_id = generate_xml_id(name, viaf) if name and name.strip() else f"pers-viaf-{viaf}"
-    person = etree.Element('person', {f'{{{NS_XML}}}id': xml_id})
+    log.debug("Creating TEI XML entry for the authority file...")
+    if xml_id is None:
+        xml_id = generate_xml_id(name, viaf)
+    person = etree.Element('person', {_XML_ID: xml_id})
 
     persName = etree.SubElement(person, 'persName')
     persName.text = name if name else "Unknown Name"
@@ -173,14 +547,14 @@ def create_person_entry(viaf, name, birth, death, warning_note=None):
         death_el = etree.SubElement(person, 'death')
         death_el.text = death
 
-    idno = etree.SubElement(person, 'idno', attrib={'type': 'VIAF'})
+    idno = etree.SubElement(person, 'idno', attrib=_IDNO_ATTR)
     idno.text = viaf
 
     if warning_note:
-        note = etree.SubElement(person, 'note', attrib={'type': 'warning'})
+        note = etree.SubElement(person, 'note', attrib=_WARN_ATTR)
         note.text = warning_note
 
-    print("TEI entry created successfully.")
+    log.debug("TEI entry created successfully.")
     return person
 
 def create_annotation_tag(xml_id, name):
@@ -192,35 +566,200 @@ def create_annotation_tag(xml_id, name):
     annotation.text = name if name else "Unknown Name"
     return annotation
 
-def main():
-    if len(sys.argv) != 2:
-        print("Usage: persNamer.py <VIAF number>")
-        sys.exit(1)
-    viaf = sys.argv[1]
-    print(f"Processing VIAF number: {viaf}")
+def _check_xml_chars(value):
+    """
+    Raises ValueError, as lxml does, if value contains characters that
+    cannot appear in an XML document.
+    """
+    if _XML_ILLEGAL_RE.search(value):
+        raise ValueError("All strings must be XML compatible: Unicode or ASCII, "
+                         "no NULL bytes or control characters")
+    return value
+
+def _xml_text(value):
+    """
+    Escapes a string for use as element text, the way lxml serializes it.
+    """
+    return escape(_check_xml_chars(value), _TEXT_ENTITIES)
+
+def _xml_attr(value):
+    """
+    Escapes a string for use as a double-quoted attribute value, the way
+    lxml serializes it.
+    """
+    return escape(_check_xml_chars(value), _ATTR_ENTITIES)
+
+def format_person_entry(viaf, name, birth, death, warning_note=None, xml_id=None):
+    """
+    Same TEI <person> entry as create_person_entry, rendered directly
+    from a string template instead of building an lxml tree.
+    Returns the serialized entry as a string.
+    """
+    log.debug("Creating TEI XML entry for the authority file...")
+    if xml_id is None:
+        xml_id = generate_xml_id(name, viaf)
+    entry = _PERSON_TMPL.format(
+        xid=_xml_attr(xml_id),
+        name=_xml_text(name if name else "Unknown Name"),
+        birth=_BIRTH_TMPL.format(_xml_text(birth)) if birth else "",
+        death=_DEATH_TMPL.format(_xml_text(death)) if death else "",
+        viaf=_xml_text(viaf),
+        warn=_WARN_TMPL.format(_xml_text(warning_note)) if warning_note else "",
+    )
+    log.debug("TEI entry created successfully.")
+    return entry
+
+def format_annotation_tag(xml_id, name):
+    """
+    Same annotation tag as create_annotation_tag, rendered as a string.
+    """
+    return _ANNOTATION_TMPL.format(
+        xid=_xml_attr(xml_id),
+        name=_xml_text(name if name else "Unknown Name"),
+    )
+
+def _unique_xml_id(xml_id, viaf, used_ids):
+    """
+    Makes xml_id unique among used_ids (the ids already emitted in this
+    batch) by appending the VIAF number, and records it as used.
+    Example: a second "pers-dupont-j" becomes "pers-dupont-j-<viaf>"
+    """
+    if xml_id in used_ids:
+        candidate = f"{xml_id}-{viaf}"
+        n = 2
+        while candidate in used_ids:
+            candidate = f"{xml_id}-{viaf}-{n}"
+            n += 1
+        log.warning("xml:id %s is already used in this batch; using %s for VIAF %s",
+                    xml_id, candidate, viaf)
+        xml_id = candidate
+    used_ids.add(xml_id)
+    return xml_id
+
+def build_entries(people, failed, use_lxml=False):
+    """
+    Logs each record yielded by get_people and builds its TEI <person>
+    entry, with xml:ids made unique across the batch.
+    Yields (viaf, name, xml_id, entry) tuples, entry being an lxml element
+    if use_lxml is set and a serialized string otherwise. Records that
+    failed to fetch, parse or serialize are logged, skipped and their VIAF
+    numbers appended to `failed`.
+    """
+    used_ids = set()
+    for viaf, person, error in people:
+        if error:
+            log.error("Skipping VIAF %s: %s", viaf, error)
+            failed.append(viaf)
+            continue
+        name, birth, death, warning = person
 
-    rdf_bytes = fetch_viaf_rdf(viaf)
-    name, birth, death, warning = parse_viaf_rdf(rdf_bytes, viaf)
+        log.info("Processing VIAF number: %s", viaf)
+        log.info("Name found: %s", name if name else "(none)")
+        log.info("Birth date found: %s", birth if birth else "(none)")
+        log.info("Death date found: %s", death if death else "(none)")
+        if warning:
+            log.warning("Warning: %s", warning)
+
+        xml_id = _unique_xml_id(generate_xml_id(name, viaf), viaf, used_ids)
+        build = create_person_entry if use_lxml else format_person_entry
+        try:
+            entry = build(viaf, name, birth, death, warning, xml_id=xml_id)
+        except ValueError as e:
+            log.error("Skipping VIAF %s: cannot serialize record: %s", viaf, e)
+            failed.append(viaf)
+            continue
+        yield viaf, name, xml_id, entry
+
+def write_authority_file(output, people, use_lxml=False):
+    """
+    Streams TEI <person> entries into a <listPerson> authority file.
+    Each entry is serialized as soon as it is built and then dropped, so
+    memory use stays flat however many records are written. With use_lxml
+    the file is written through lxml's etree.xmlfile, otherwise from the
+    string templates; both produce the same bytes.
+    `output` is a path or a binary file object; `people` yields
+    (viaf, (name, birth, death, warning), error) tuples, as get_people does.
+    Failed records are logged and skipped.
+    Returns the number of entries written and the list of skipped VIAFs.
+    """
+    count = 0
+    failed = []
+    entries = build_entries(people, failed, use_lxml=use_lxml)
+    if use_lxml:
+        with etree.xmlfile(output, encoding="utf-8") as xf:
+            xf.write_declaration()
+            with xf.element("listPerson"):
+                xf.write("\n")
+                for _, _, _, entry in entries:
+                    xf.write(entry, pretty_print=True)
+                    count += 1
+        return count, failed
 
-    print(f"Name found: {name if name else '(none)'}")
-    print(f"Birth date found: {birth if birth else '(none)'}")
-    print(f"Death date found: {death if death else '(none)'}")
-    if warning:
-        print(f"Warning: {warning}")
-    print("Creating TEI XML entry for the authority file...")
+    with (open(output, "wb") if isinstance(output, (str, os.PathLike))
+          else contextlib.nullcontext(output)) as out:
+        out.write(b"<?xml version='1.0' encoding='utf-8'?>\n<listPerson>\n")
+        for _, _, _, entry in entries:
+            out.write(entry.encode("utf-8"))
+            count += 1
+        out.write(b"</listPerson>")
+    return count, failed
 
-    person_entry = create_person_entry(viaf, name, birth, death, warning)
-    xml_id = person_entry.get("{http://www.w3.org/XML/1998/namespace}id")
-    annotation_tag = create_annotation_tag(xml_id, name)
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Builds TEI authority entries and annotation tags from VIAF records."
+    )
+    parser.add_argument("viafs", nargs="+", metavar="VIAF", help="one or more VIAF numbers")
+    parser.add_argument("--workers", type=int, default=16,
+                        help="number of concurrent fetches (default: 16)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help=f"do not read or update the record cache ({CACHE_PATH})")
+    parser.add_argument("-o", "--output", metavar="PATH",
+                        help="write all entries to a TEI <listPerson> authority file at PATH "
+                             "instead of printing them")
+    parser.add_argument("-v", "--verbose", action="store_true",
+                        help="log fetch/parse progress for every record")
+    parser.add_argument("--lxml", action="store_true",
+                        help="build the TEI output as lxml trees instead of string templates")
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    return args
+
+def print_entry(name, xml_id, entry):
+    """
+    Prints a TEI authority entry (lxml element or serialized string, as
+    yielded by build_entries) and its annotation tag.
+    """
+    if isinstance(entry, str):
+        authority_xml = entry
+        annotation_xml = format_annotation_tag(xml_id, name)
+    else:
+        authority_xml = etree.tostring(entry, pretty_print=True, encoding='unicode')
+        annotation_xml = etree.tostring(create_annotation_tag(xml_id, name),
+                                        pretty_print=True, encoding='unicode')
 
-    print("\n" * 3)
     print("Final TEI Authority XML entry:")
-    authority_xml = etree.tostring(person_entry, pretty_print=True, encoding='unicode')
     print(authority_xml)
 
     print("\nFinal Annotation tag for TEI text (to be used separately):")
-    annotation_xml = etree.tostring(annotation_tag, pretty_print=True, encoding='unicode')
     print(annotation_xml)
 
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO,
+                        format="%(message)s")
+    cache_path = None if args.no_cache else CACHE_PATH
+    people = get_people(args.viafs, workers=args.workers, cache_path=cache_path)
+    if args.output:
+        count, failed = write_authority_file(args.output, people, use_lxml=args.lxml)
+        log.info("Wrote %d entries to %s", count, args.output)
+    else:
+        failed = []
+        for _, name, xml_id, entry in build_entries(people, failed, use_lxml=args.lxml):
+            print_entry(name, xml_id, entry)
+    if failed:
+        log.error("%d record(s) failed: %s", len(failed), ", ".join(failed))
+        sys.exit(1)
+
 if __name__ == '__main__':
     main()